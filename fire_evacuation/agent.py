@@ -1,3 +1,6 @@
+import logging
+import math
+from functools import lru_cache
 from typing import Union
 from typing_extensions import Self
 from mesa.space import Coordinate
@@ -5,9 +8,10 @@ import networkx as nx
 import numpy as np
 from enum import IntEnum
 from mesa import Agent
-from copy import deepcopy
 
-from fire_evacuation.utils import get_random_id
+from fire_evacuation.utils import MOORE_OFFSETS, get_random_id
+
+logger = logging.getLogger(__name__)
 
 
 def get_line(start, end):
@@ -15,59 +19,72 @@ def get_line(start, end):
     Implementaiton of Bresenham's Line Algorithm
     Returns a list of tuple coordinates from starting tuple to end tuple (and including them)
     """
-    # Break down start and end tuples
-    x1, y1 = start
-    x2, y2 = end
+    return [tuple(coord) for coord in get_line_np(start, end).tolist()]
 
-    # Calculate differences
-    diff_x = x2 - x1
-    diff_y = y2 - y1
 
-    # Check if the line is steep
-    line_is_steep = abs(diff_y) > abs(diff_x)
+def get_line_np(start, end) -> np.ndarray:
+    """
+    Vectorised implementation of Bresenham's Line Algorithm
+    Returns an (n, 2) int32 array of coordinates from starting tuple to end tuple (and including them)
+    """
+    x1, y1 = start
+    x2, y2 = end
 
-    # If the line is steep, rotate it
+    # Rotate steep lines and order the points along the x-axis
+    line_is_steep = abs(y2 - y1) > abs(x2 - x1)
     if line_is_steep:
-        # Swap x and y values for each pair
         x1, y1 = y1, x1
         x2, y2 = y2, x2
 
-    # If the start point is further along the x-axis than the end point, swap start and end
-    swapped = False
-    if x1 > x2:
+    swapped = x1 > x2
+    if swapped:
         x1, x2 = x2, x1
         y1, y2 = y2, y1
-        swapped = True
 
-    # Calculate the differences again
     diff_x = x2 - x1
-    diff_y = y2 - y1
+    diff_y = abs(y2 - y1)
+    # The sign of the y direction. When y doesn't change it's never used, so 0 is fine there
+    step_y = (y2 > y1) - (y2 < y1)
+
+    # The error margin starts at half of diff_x, loses diff_y per step along x, and y is stepped
+    # whenever it drops below zero, so the number of y steps taken before the i-th coordinate is
+    # ceil((i * diff_y - diff_x // 2) / diff_x)
+    steps = np.arange(diff_x + 1, dtype=np.int32)
+    x_col, y_col = (1, 0) if line_is_steep else (0, 1)
+
+    # Write both axes straight into one preallocated array, swapping them back for steep lines
+    path = np.empty((diff_x + 1, 2), dtype=np.int32)
+    path[:, x_col] = x1 + steps
+    path[:, y_col] = y1 - step_y * ((diff_x // 2 - steps * diff_y) // max(diff_x, 1))
+
+    # If the start and end were swapped, reverse the path
+    if swapped:
+        path = path[::-1]
 
-    # Calculate the error margin
-    error_margin = int(diff_x / 2.0)
-    step_y = 1 if y1 < y2 else -1
+    return path
 
-    # Iterate over the bounding box, generating coordinates between the start and end coordinates
-    y = y1
-    path = []
 
-    for x in range(x1, x2 + 1):
-        # Get a coordinate according to if x and y values were swapped
-        coord = (y, x) if line_is_steep else (x, y)
-        path.append(coord)  # Add it to our path
-        # Deduct the absolute difference of y values from our error_margin
-        error_margin -= abs(diff_y)
+@lru_cache(maxsize=None)
+def get_sight_rays(radius: int) -> np.ndarray:
+    """
+    Returns an (n, radius + 1, 2) int32 array of Bresenham lines from (0, 0), which between them
+    pass through every offset within radius. Shorter lines are padded by repeating their end point.
+    """
+    offsets = [(dx, dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)]
+    # Cast to the edge of the square first, then to anything those lines didn't pass through
+    offsets.sort(key=lambda offset: max(abs(offset[0]), abs(offset[1])), reverse=True)
 
-        # When the error margin drops below zero, increase y by the step and the error_margin by the x difference
-        if error_margin < 0:
-            y += step_y
-            error_margin += diff_x
+    rays = []
+    covered = set()
+    for offset in offsets:
+        if offset not in covered:
+            line = get_line_np((0, 0), offset)
+            covered.update(map(tuple, line.tolist()))
 
-    # The the start and end were swapped, reverse the path
-    if swapped:
-        path.reverse()
+            padding = np.repeat(line[-1:], radius + 1 - len(line), axis=0)
+            rays.append(np.concatenate((line, padding)))
 
-    return path
+    return np.array(rays, dtype=np.int32)
 
 
 """
@@ -75,58 +92,81 @@ FLOOR STUFF
 """
 
 
+class Kind(IntEnum):
+    """
+    Type tags for agents, letting hot loops compare an integer rather than call isinstance
+    """
+
+    WALL = 0
+    FIRE = 1
+    SMOKE = 2
+    DOOR = 3
+    EXIT = 4
+    FURNITURE = 5
+    DEAD = 6
+    SIGHT = 7
+    HUMAN = 8
+
+
 class FloorObject(Agent):
-    def __init__(
-        self,
-        pos: Coordinate,
-        traversable: bool,
-        flammable: bool,
-        spreads_smoke: bool,
-        visibility: int = 2,
-        model=None,
-    ):
+    # Floors are made of thousands of these, so like Human they keep their attributes in slots rather
+    # than a per-instance __dict__. Subclasses declare empty __slots__ so they don't get one either
+    __slots__ = ("unique_id", "model", "pos")
+
+    # These never change for a given kind of floor object, so they're shared by the class rather
+    # than stored on every instance
+    traversable = True
+    flammable = False
+    spreads_smoke = True
+    visibility = 2
+
+    def __init__(self, pos: Coordinate, model=None):
         rand_id = get_random_id()
         super().__init__(rand_id, model)
         self.pos = pos
-        self.traversable = traversable
-        self.flammable = flammable
-        self.spreads_smoke = spreads_smoke
-        self.visibility = visibility
 
     def get_position(self):
         return self.pos
 
 
 class Sight(FloorObject):
-    def __init__(self, pos, model):
-        super().__init__(
-            pos, traversable=True, flammable=False, spreads_smoke=True, visibility=-1, model=model
-        )
+    __slots__ = ()
+
+    KIND = Kind.SIGHT
+    visibility = -1
 
     def get_position(self):
         return self.pos
 
 
 class Door(FloorObject):
-    def __init__(self, pos, model):
-        super().__init__(pos, traversable=True, flammable=False, spreads_smoke=True, model=model)
+    __slots__ = ()
+
+    KIND = Kind.DOOR
 
 
 class FireExit(FloorObject):
-    def __init__(self, pos, model):
-        super().__init__(
-            pos, traversable=True, flammable=False, spreads_smoke=False, visibility=6, model=model
-        )
+    __slots__ = ()
+
+    KIND = Kind.EXIT
+    spreads_smoke = False
+    visibility = 6
 
 
 class Wall(FloorObject):
-    def __init__(self, pos, model):
-        super().__init__(pos, traversable=False, flammable=False, spreads_smoke=False, model=model)
+    __slots__ = ()
+
+    KIND = Kind.WALL
+    traversable = False
+    spreads_smoke = False
 
 
 class Furniture(FloorObject):
-    def __init__(self, pos, model):
-        super().__init__(pos, traversable=False, flammable=True, spreads_smoke=True, model=model)
+    __slots__ = ()
+
+    KIND = Kind.FURNITURE
+    traversable = False
+    flammable = True
 
 
 """
@@ -138,55 +178,18 @@ class Fire(FloorObject):
     """
     A fire agent
 
+    Fire doesn't act on its own, instead FireEvacuation.spread_fire spreads every fire at once
+
     Attributes:
         ...
     """
 
-    def __init__(self, pos, model):
-        super().__init__(
-            pos,
-            traversable=False,
-            flammable=False,
-            spreads_smoke=True,
-            visibility=20,
-            model=model,
-        )
-        self.smoke_radius = 1
+    __slots__ = ()
 
-    def step(self):
-        neighborhood = self.model.grid.get_neighborhood(
-            self.pos, moore=False, include_center=False, radius=self.smoke_radius
-        )
-
-        for neighbor_pos in neighborhood:
-            contents = self.model.grid.get_cell_list_contents(neighbor_pos)
-
-            if len(contents) > 0:
-                has_smoke = False
-                has_fire = False
-                for agent in contents:
-                    if isinstance(agent, Smoke):
-                        has_smoke = True
-                    elif isinstance(agent, Fire):
-                        has_fire = True
-                    if has_smoke and has_fire:
-                        break
-
-                if not has_fire:
-                    for agent in contents:
-                        if agent.flammable:
-                            fire = Fire(neighbor_pos, self.model)
-                            self.model.schedule.add(fire)
-                            self.model.grid.place_agent(fire, neighbor_pos)
-                            break
-
-                if not has_smoke:
-                    for agent in contents:
-                        if agent.spreads_smoke:
-                            smoke = Smoke(neighbor_pos, self.model)
-                            self.model.schedule.add(smoke)
-                            self.model.grid.place_agent(smoke, neighbor_pos)
-                            break
+    KIND = Kind.FIRE
+    VISIBILITY = 20
+    traversable = False
+    visibility = VISIBILITY
 
     def get_position(self):
         return self.pos
@@ -196,47 +199,32 @@ class Smoke(FloorObject):
     """
     A smoke agent
 
+    Smoke doesn't act on its own, instead FireEvacuation.spread_smoke spreads all smoke at once
+
     Attributes:
         ...
     """
 
-    def __init__(self, pos, model):
-        super().__init__(pos, traversable=True, flammable=False, spreads_smoke=False, model=model)
-        self.smoke_radius = 1
-        self.spread_rate = 1  # The increment per step to increase self.spread by
-        self.spread_threshold = 1
-        self.spread = 0  # When equal or greater than spread_threshold, the smoke will spread to its neighbors
-
-    def step(self):
-        if self.spread >= 1:
-            smoke_neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=False, include_center=False, radius=self.smoke_radius
-            )
-            for neighbor in smoke_neighborhood:
-                place_smoke = True
-                contents = self.model.grid.get_cell_list_contents(neighbor)
-                for agent in contents:
-                    if not agent.spreads_smoke:
-                        place_smoke = False
-                        break
+    __slots__ = ()
 
-                if place_smoke:
-                    smoke = Smoke(neighbor, self.model)
-                    self.model.grid.place_agent(smoke, neighbor)
-                    self.model.schedule.add(smoke)
-
-        if self.spread >= self.spread_threshold:
-            self.spread_rate = 0
-        else:
-            self.spread += self.spread_rate
+    KIND = Kind.SMOKE
+    VISIBILITY = 2
+    # The number of steps after appearing before smoke starts to spread to its neighbors
+    SPREAD_DELAY = 2
+    spreads_smoke = False
+    visibility = VISIBILITY
 
     def get_position(self):
         return self.pos
 
 
 class DeadHuman(FloorObject):
-    def __init__(self, pos, model):
-        super().__init__(pos, traversable=True, flammable=True, spreads_smoke=True, model=model)
+    __slots__ = ()
+
+    KIND = Kind.DEAD
+    VISIBILITY = 2
+    flammable = True
+    visibility = VISIBILITY
 
 
 class Human(Agent):
@@ -250,6 +238,49 @@ class Human(Agent):
         ...
     """
 
+    # Mesa's Agent base class doesn't define __slots__, so instances can still grow a __dict__,
+    # but as long as every attribute is listed here it is never allocated
+    __slots__ = (
+        "unique_id",
+        "model",
+        "_pos",
+        "previous_pos",
+        "traversable",
+        "flammable",
+        "spreads_smoke",
+        "visibility",
+        "idx",
+        "mobility",
+        "vision",
+        "collaborates",
+        "verbal_collaboration_count",
+        "morale_collaboration_count",
+        "physical_collaboration_count",
+        "morale_boost",
+        "carried",
+        "carrying",
+        "knowledge",
+        "nervousness",
+        "experience",
+        "experience_panic",
+        "believes_alarm",
+        "escaped",
+        "_status",
+        "planned_target_agent",
+        "planned_target_pos",
+        "planned_action",
+        "visible_tiles",
+        "visible_occupied_tiles",
+        "visible_mask",
+        "visible_positions",
+        "visible_smoke",
+        "known_tiles",
+        "known_mask",
+        "visited_mask",
+        "sight_tiles",
+        "cached_path",
+    )
+
     class Mobility(IntEnum):
         INCAPACITATED = 0
         NORMAL = 1
@@ -266,6 +297,8 @@ class Human(Agent):
         VERBAL_SUPPORT = 2
         RETREAT = 3
 
+    KIND = Kind.HUMAN
+
     MIN_HEALTH = 0.0
     MAX_HEALTH = 1.0
 
@@ -314,6 +347,10 @@ class Human(Agent):
         believes_alarm: bool,
         model,
     ):
+        # Health, speed, shock and position live in the model's per-human arrays, at this index
+        self.idx = len(model.humans)
+        model.humans.append(self)
+
         rand_id = get_random_id()
         super().__init__(rand_id, model)
 
@@ -327,7 +364,7 @@ class Human(Agent):
         self.visibility = 2
         self.health = health
         self.mobility: Human.Mobility = Human.Mobility.NORMAL
-        self.shock: int = self.MIN_SHOCK
+        self.shock = self.MIN_SHOCK
         self.speed = speed
         self.vision = vision
 
@@ -345,170 +382,224 @@ class Human(Agent):
         self.knowledge = self.MIN_KNOWLEDGE
         self.nervousness = nervousness
         self.experience = experience
+        # Experience and nervousness are fixed, so their part of the panic score is worked out once
+        self.experience_panic = math.exp(-experience / nervousness)
         self.believes_alarm = believes_alarm  # Boolean stating whether or not the agent believes the alarm is a real fire
         self.escaped: bool = False
+        self._status: Human.Status = Human.Status.ALIVE
 
-        # The agent and seen location (agent, (x, y)) the agent is planning to move to
-        self.planned_target: tuple[Agent, Coordinate] = (
-            None,
-            None,
-        )
+        # The agent and seen location (x, y) the agent is planning to move to
+        self.planned_target_agent: Agent = None
+        self.planned_target_pos: Coordinate = None
 
         self.planned_action: Human.Action = None  # An action the agent intends to do when they reach their planned target {"carry", "morale"}
 
-        self.visible_tiles: tuple[Coordinate, tuple[Agent]] = []
+        self.visible_tiles: tuple[Coordinate, frozenset[Agent]] = []
+
+        # The tiles in visible_tiles that something can be seen on, in the same order
+        self.visible_occupied_tiles: tuple[Coordinate, frozenset[Agent]] = ()
+
+        # A mask over the grid of the positions within visible_tiles, for constant time lookups
+        self.visible_mask: np.ndarray = np.zeros((model.grid.width, model.grid.height), dtype=bool)
+
+        # The position of each tile in visible_tiles, and the amount of smoke it's seen through
+        self.visible_positions: np.ndarray = np.empty((0, 2), dtype=np.int32)
+        self.visible_smoke: np.ndarray = np.empty(0, dtype=np.int32)
 
         # An empty set representing what the agent knows of the floor plan
-        self.known_tiles: dict[Coordinate, set[Agent]] = {}
+        self.known_tiles: dict[Coordinate, frozenset[Agent]] = {}
+
+        # Masks over the grid of the tiles in known_tiles, and of where the agent has already been
+        shape = (model.grid.width, model.grid.height)
+        self.known_mask: np.ndarray = np.zeros(shape, dtype=bool)
+        self.visited_mask: np.ndarray = np.zeros(shape, dtype=bool)
+        self.visited_mask[self.pos] = True
+
+        # The Sight objects this agent has placed, when visualising vision
+        self.sight_tiles: dict[Coordinate, Sight] = {}
 
-        # A set representing where the agent has been already
-        self.visited_tiles: set[Coordinate] = {self.pos}
+        # The last unobstructed path we were given, which stays valid for as long as we follow it
+        self.cached_path: list[Coordinate] = []
 
     def update_sight_tiles(self, visible_neighborhood):
-        if len(self.visible_tiles) > 0:
-            # Remove old vision tiles
-            for pos, _ in self.visible_tiles:
-                contents = self.model.grid.get_cell_list_contents(pos)
-                for agent in contents:
-                    if isinstance(agent, Sight):
-                        self.model.grid.remove_agent(agent)
+        if not self.model.visualise_vision:
+            return
 
-        # Add new vision tiles
-        for contents, tile in visible_neighborhood:
-            # Don't place if the tile has contents but the agent can't see it
-            if self.model.grid.is_cell_empty(tile) or len(contents) > 0:
-                sight_object = Sight(tile, self.model)
-                self.model.grid.place_agent(sight_object, tile)
+        grid = self.model.grid
+        sight_positions = set()
+        for tile, contents in visible_neighborhood:
+            # Don't place if the tile has contents but the agent can't see it. Sight objects don't count
+            if len(contents) > 0 or all(
+                agent.KIND == Kind.SIGHT for agent in grid.get_cell_list_contents(tile)
+            ):
+                sight_positions.add(tile)
 
-    # A strange implementation of ray-casting, using Bresenham's Line Algorithm, which takes into account smoke and visibility of objects
-    def get_visible_tiles(self) -> tuple[Coordinate, tuple[Agent]]:
-        neighborhood = self.model.grid.get_neighborhood(
-            self.pos, moore=True, include_center=True, radius=self.vision
-        )
-        visible_neighborhood = set()
-
-        # A set of already checked tiles, for avoiding repetition and thus increased efficiency
-        checked_tiles = set()
-
-        # Reverse the neighborhood so we start from the furthest locations and work our way inwards
-        for pos in reversed(neighborhood):
-            if pos not in checked_tiles:
-                blocked = False
-                try:
-                    smoke_count = 0  # The number of smoke tiles encountered in the path so far
-                    path = get_line(self.pos, pos)
-
-                    for i, tile in enumerate(path):
-                        contents = self.model.grid.get_cell_list_contents(tile)
-                        visible_contents = []
-                        for obj in contents:
-                            if isinstance(obj, Sight):
-                                # ignore sight tiles
-                                continue
-                            elif isinstance(obj, Wall):
-                                # We hit a wall, reject rest of path and move to next
-                                blocked = True
-                                break
-                            elif isinstance(obj, Smoke):
-                                # We hit a smoke tile, increase the counter
-                                smoke_count += 1
-
-                            # If the object has a visibility score greater than the smoke encountered in the path, it's visible
-                            if obj.visibility and obj.visibility > smoke_count:
-                                visible_contents.append(obj)
-
-                        if blocked:
-                            checked_tiles.update(
-                                path[i:]
-                            )  # Add the rest of the path to checked tiles, since we now know they are not visible
-                            break
-                        else:
-                            # If a wall didn't block the way, add the visible agents at this location
-                            checked_tiles.add(
-                                tile
-                            )  # Add the tile to checked tiles so we don't check it again
-                            visible_neighborhood.add((tile, tuple(visible_contents)))
+        # Only remove and place the Sight objects for tiles that have changed since the last step
+        for pos in self.sight_tiles.keys() - sight_positions:
+            grid.remove_agent(self.sight_tiles.pop(pos))
 
-                except Exception as e:
-                    print(e)
+        for pos in sight_positions - self.sight_tiles.keys():
+            sight_object = Sight(pos, self.model)
+            grid.place_agent(sight_object, pos)
+            self.sight_tiles[pos] = sight_object
+
+    # A strange implementation of ray-casting, using Bresenham's Line Algorithm, which takes into account smoke and visibility of objects
+    def update_visible_tiles(self):
+        """
+        Recalculate what the agent can see. Sets visible_tiles and visible_occupied_tiles, along
+        with visible_positions and visible_smoke, which hold each visible tile's position and the
+        smoke it's seen through
+        """
+        grid = self.model.grid
+        width, height = grid.width, grid.height
+
+        # Cast every ray at once, from our position
+        rays = get_sight_rays(self.vision)
+        xs = rays[:, :, 0] + self.pos[0]
+        ys = rays[:, :, 1] + self.pos[1]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        xs = xs.clip(0, width - 1)
+        ys = ys.clip(0, height - 1)
+
+        # Everything from the first wall (or the edge of the grid) in a ray onwards is hidden behind it
+        blocked = ~inside | grid.wall_mask[xs, ys]
+        visible = np.logical_and.accumulate(~blocked, axis=1)
+
+        # Indoors every ray usually stops well short of our vision, so drop the steps beyond the
+        # furthest one any ray reaches before doing anything else with them
+        depth = np.count_nonzero(visible.any(axis=0))
+        xs, ys, visible = xs[:, :depth], ys[:, :depth], visible[:, :depth]
+        tiles = xs[visible] * height + ys[visible]
+
+        # The number of smoke tiles encountered in each ray so far, at each tile
+        smoke_counts = np.cumsum(grid.smoke_mask[xs, ys], axis=1)[visible]
+
+        if smoke_counts.any():
+            # A tile seen by several rays is seen through the least smoke of any of them
+            least_smoke = np.full(width * height, np.iinfo(np.int32).max, dtype=np.int32)
+            np.minimum.at(least_smoke, tiles, smoke_counts)
+            tiles = np.flatnonzero(least_smoke != np.iinfo(np.int32).max)
+            self.visible_smoke = least_smoke[tiles]
+        else:
+            # Without any smoke in view, there's only the duplicate tiles to remove
+            seen = np.zeros(width * height, dtype=bool)
+            seen[tiles] = True
+            tiles = np.flatnonzero(seen)
+            self.visible_smoke = np.zeros(len(tiles), dtype=np.int32)
+
+        self.visible_positions = np.column_stack(np.divmod(tiles, height))
+
+        # Most visible tiles are empty, so only look inside the cells that have something in them
+        positions = self.visible_positions.tolist()
+        visible_neighborhood = [((x, y), frozenset()) for x, y in positions]
+        occupied = np.flatnonzero(grid.agent_count[tuple(self.visible_positions.T)]).tolist()
+
+        cells = grid.grid
+        tile_smoke = self.visible_smoke.tolist()
+        visible_occupied = []
+        for i in occupied:
+            x, y = positions[i]
+            smoke_count = tile_smoke[i]
+            # If an object has a visibility score greater than the smoke encountered in the path, it's visible
+            visible_contents = frozenset(
+                obj for obj in cells[x][y] if obj.visibility > smoke_count
+            )
+            visible_neighborhood[i] = ((x, y), visible_contents)
+            if visible_contents:
+                visible_occupied.append(visible_neighborhood[i])
 
         if self.model.visualise_vision:
             self.update_sight_tiles(visible_neighborhood)
 
-        return tuple(visible_neighborhood)
+        self.visible_tiles = tuple(visible_neighborhood)
+        self.visible_occupied_tiles = tuple(visible_occupied)
+        self.visible_mask.fill(False)
+        self.visible_mask[tuple(self.visible_positions.T)] = True
 
     def get_random_target(self, allow_visited=True):
-        graph_nodes = self.model.graph.nodes()
+        if self.planned_target_pos:
+            return
 
-        known_pos = set(self.known_tiles.keys())
+        # Filter out anything that can't be a target up front, so a single pick is always valid
+        candidates = (
+            self.known_mask & self.model.graph_mask & (self.model.grid.blocking_count == 0)
+        )
 
-        # If we are excluding visited tiles, remove the visited_tiles set from the available tiles
+        # If we are excluding visited tiles, remove them from the available tiles
         if not allow_visited:
-            known_pos -= self.visited_tiles
+            candidates &= ~self.visited_mask
 
-        traversable_pos = [pos for pos in known_pos if self.location_is_traversable(pos)]
+        candidates[self.pos] = False
 
-        while not self.planned_target[1]:
-            i = np.random.choice(len(traversable_pos))
-            target_pos = traversable_pos[i]
-            if target_pos in graph_nodes and target_pos != self.pos:
-                self.planned_target = (None, target_pos)
+        tiles = np.flatnonzero(candidates)
+        if tiles.size:
+            i = np.random.randint(tiles.size)
+            x, y = divmod(int(tiles[i]), candidates.shape[1])
+            self.planned_target_agent = None
+            self.planned_target_pos = (x, y)
 
     def attempt_exit_plan(self):
-        self.planned_target = (None, None)
+        self.planned_target_agent = None
+        self.planned_target_pos = None
         fire_exits = set()
 
-        for pos, agents in self.known_tiles.items():
-            for agent in agents:
-                if isinstance(agent, FireExit):
-                    fire_exits.add((agent, pos))
+        # There are only a few exits, so check which of them we know about rather than searching
+        # everything we know
+        for pos, exit in self.model.fire_exits.items():
+            if exit in self.known_tiles.get(pos, ()):
+                fire_exits.add((exit, pos))
 
         if len(fire_exits) > 0:
             if len(fire_exits) > 1:  # If there is more than one exit known
                 best_distance = None
+                x, y = self.pos
                 for exit, exit_pos in fire_exits:
-                    length = len(
-                        get_line(self.pos, exit_pos)
-                    )  # Let's use Bresenham's to find the 'closest' exit
-                    if not best_distance or length < best_distance:
+                    # Find the 'closest' exit by Chebyshev distance, which is one less than the
+                    # length of the Bresenham line to it
+                    length = max(abs(x - exit_pos[0]), abs(y - exit_pos[1]))
+                    if best_distance is None or length < best_distance:
                         best_distance = length
-                        self.planned_target = (exit, exit_pos)
+                        self.planned_target_agent = exit
+                        self.planned_target_pos = exit_pos
 
             else:
-                self.planned_target = fire_exits.pop()
+                self.planned_target_agent, self.planned_target_pos = fire_exits.pop()
 
-            # print("Agent found a fire escape!", self.planned_target)
+            # print("Agent found a fire escape!", self.planned_target_pos)
         else:  # If there's a fire and no fire-escape in sight, try to head for an unvisited door, if no door in sight, move randomly (for now)
             found_door = False
-            for pos, contents in self.visible_tiles:
+            # Only the visible tiles with doors on need their contents checking
+            xs, ys = self.visible_positions[:, 0], self.visible_positions[:, 1]
+            for i in np.flatnonzero(self.model.grid.door_mask[xs, ys]).tolist():
+                pos, contents = self.visible_tiles[i]
                 for agent in contents:
-                    if isinstance(agent, Door):
+                    if agent.KIND == Kind.DOOR:
                         found_door = True
-                        self.planned_target = (agent, pos)
+                        self.planned_target_agent = agent
+                        self.planned_target_pos = pos
                         break
 
                 if found_door:
                     break
 
             # Still didn't find a planned_target, so get a random unvisited target
-            if not self.planned_target[1]:
+            if not self.planned_target_pos:
                 self.get_random_target(allow_visited=False)
 
     def get_panic_score(self):
-        health_component = 1 / np.exp(self.health / self.nervousness)
-        experience_component = 1 / np.exp(self.experience / self.nervousness)
+        health_component = math.exp(-self.health / self.nervousness)
 
         # Calculate the mean of the components
-        panic_score = (health_component + experience_component + self.shock) / 3
+        panic_score = (health_component + self.experience_panic + self.shock) / 3
 
-        # print("Panic score:", panic_score, "Health Score:", health_component, "Experience Score:", experience_component, "Shock score:", self.shock)
+        # print("Panic score:", panic_score, "Health Score:", health_component, "Experience Score:", self.experience_panic, "Shock score:", self.shock)
 
         return panic_score
 
     def incapacitate(self):
         self.stop_carrying()
-        self.mobility = Human.Mobility.INCAPACITATED
-        self.traversable = True
+        self.mobility = _INCAPACITATED
+        self.model.grid.set_traversable(self, True)
 
     def die(self):
         # Store the agent's position of death so we can remove them and place a DeadHuman
@@ -516,30 +607,17 @@ class Human(Agent):
         self.model.grid.remove_agent(self)
         dead_self = DeadHuman(pos, self.model)
         self.model.grid.place_agent(dead_self, pos)
-        print("Agent died at", pos)
+        logger.debug("Agent died at %s", pos)
 
     def health_mobility_rules(self):
-        moore_neighborhood = self.model.grid.get_neighborhood(
-            self.pos, moore=True, include_center=True, radius=1
-        )
-        contents = self.model.grid.get_cell_list_contents(moore_neighborhood)
-
-        for agent in contents:
-            if isinstance(agent, Fire):
-                self.health -= self.HEALTH_MODIFIER_FIRE
-                self.speed -= self.SPEED_MODIFIER_FIRE
-            elif isinstance(agent, Smoke):
-                self.health -= self.HEALTH_MODIFIER_SMOKE
-
-                # Start to slow the agent when they drop below 50% health
-                if self.health < self.SLOWDOWN_THRESHOLD:
-                    self.speed -= self.SPEED_MODIFIER_SMOKE
+        # Fire and smoke damage is applied to every human at once by the model at the start of each
+        # step (see FireEvacuation.apply_hazard_damage), so only its consequences are handled here
 
-        # Prevent health and speed from going below 0
+        # Being pushed can still take health below 0
         if self.health < self.MIN_HEALTH:
             self.health = self.MIN_HEALTH
-        if self.speed < self.MIN_SPEED:
-            self.speed = self.MIN_SPEED
+
+        self.update_status()
 
         if self.health == self.MIN_HEALTH:
             self.stop_carrying()
@@ -551,24 +629,35 @@ class Human(Agent):
         if self.morale_boost:  # If the agent recieved a morale boost, they will not panic again
             return
 
+        # Count what can be seen through the smoke in the way, using the grid's arrays
+        grid = self.model.grid
+        xs, ys = self.visible_positions[:, 0], self.visible_positions[:, 1]
+        smoke = self.visible_smoke
+        fire_seen = np.count_nonzero(grid.fire_mask[xs, ys] & (smoke < Fire.VISIBILITY))
+        smoke_seen = np.count_nonzero(grid.smoke_mask[xs, ys] & (smoke < Smoke.VISIBILITY))
+        dead_seen = int(grid.dead_count[xs, ys][smoke < DeadHuman.VISIBILITY].sum())
+
+        # Only the tiles with humans on need their contents checking
+        affected_seen = 0
+        for i in np.flatnonzero(grid.human_count[xs, ys]).tolist():
+            for agent in self.visible_tiles[i][1]:
+                if agent.KIND == Kind.HUMAN and agent.mobility != _NORMAL:
+                    affected_seen += 1
+
         # Shock will decrease by this amount if no new shock is added
         shock_modifier = self.DEFAULT_SHOCK_MODIFIER
-        for _, agents in self.visible_tiles:
-            for agent in agents:
-                if isinstance(agent, Fire):
-                    shock_modifier += self.SHOCK_MODIFIER_FIRE - self.DEFAULT_SHOCK_MODIFIER
-                if isinstance(agent, Smoke):
-                    shock_modifier += self.SHOCK_MODIFIER_SMOKE - self.DEFAULT_SHOCK_MODIFIER
-                if isinstance(agent, DeadHuman):
-                    shock_modifier += self.SHOCK_MODIFIER_DEAD_HUMAN - self.DEFAULT_SHOCK_MODIFIER
-                if isinstance(agent, Human) and agent.get_mobility() != Human.Mobility.NORMAL:
-                    shock_modifier += (
-                        self.SHOCK_MODIFIER_AFFECTED_HUMAN - self.DEFAULT_SHOCK_MODIFIER
-                    )
+        shock_modifier += fire_seen * (self.SHOCK_MODIFIER_FIRE - self.DEFAULT_SHOCK_MODIFIER)
+        shock_modifier += smoke_seen * (self.SHOCK_MODIFIER_SMOKE - self.DEFAULT_SHOCK_MODIFIER)
+        shock_modifier += dead_seen * (
+            self.SHOCK_MODIFIER_DEAD_HUMAN - self.DEFAULT_SHOCK_MODIFIER
+        )
+        shock_modifier += affected_seen * (
+            self.SHOCK_MODIFIER_AFFECTED_HUMAN - self.DEFAULT_SHOCK_MODIFIER
+        )
 
         # If the agent's shock value increased and they didn't believe the alarm before, they now do believe it
         if not self.believes_alarm and shock_modifier != self.DEFAULT_SHOCK_MODIFIER:
-            print("Agent now believes the fire is real!")
+            logger.debug("Agent now believes the fire is real!")
             self.believes_alarm = True
 
         self.shock += shock_modifier
@@ -582,27 +671,29 @@ class Human(Agent):
         panic_score = self.get_panic_score()
 
         if panic_score >= self.PANIC_THRESHOLD:
-            print("Agent is panicking! Score:", panic_score, "Shock:", self.shock)
+            logger.debug("Agent is panicking! Score: %s, Shock: %s", panic_score, self.shock)
             self.stop_carrying()
-            self.mobility = Human.Mobility.PANIC
+            self.mobility = _PANIC
 
             # when an agent panics, clear known tiles
             # this represents the agent forgetting all logical information about their surroundings,
             # and having ot rebuild it once they stop panicking
             self.known_tiles = {}
+            self.known_mask[:] = False
             self.knowledge = 0
-        elif panic_score < self.PANIC_THRESHOLD and self.mobility == Human.Mobility.PANIC:
-            print("Agent stopped panicking! Score:", panic_score, "Shock:", self.shock)
-            self.mobility = Human.Mobility.NORMAL
+        elif panic_score < self.PANIC_THRESHOLD and self.mobility == _PANIC:
+            logger.debug("Agent stopped panicking! Score: %s, Shock: %s", panic_score, self.shock)
+            self.mobility = _NORMAL
 
     def learn_environment(self):
         if self.knowledge < self.MAX_KNOWLEDGE:  # If there is still something to learn
-            new_tiles = 0
+            # Count the visible tiles we didn't know about before marking them all as known
+            xs, ys = self.visible_positions.T
+            new_tiles = int(np.count_nonzero(~self.known_mask[xs, ys]))
+            self.known_mask[xs, ys] = True
 
-            for pos, agents in self.visible_tiles:
-                if pos not in self.known_tiles.keys():
-                    new_tiles += 1
-                self.known_tiles[pos] = set(agents)
+            # The visible contents are immutable, so share them
+            self.known_tiles.update(self.visible_tiles)
 
             # update the knowledge Attribute accordingly
             total_tiles = self.model.grid.width * self.model.grid.height
@@ -618,8 +709,8 @@ class Human(Agent):
             + self.physical_collaboration_count
         )
 
-        collaboration_component = 1 / np.exp(
-            1 / (total_count + 1)
+        collaboration_component = math.exp(
+            -1 / (total_count + 1)
         )  # The more time this agent has collaborated, the higher the score will become
         collaboration_cost = (collaboration_component + panic_score) / 2
         # print("Collaboration cost:", collaboration_cost, "Component:", collaboration_component, "Panic component:", panic_score)
@@ -629,7 +720,8 @@ class Human(Agent):
     def test_collaboration(self) -> bool:
         collaboration_cost = self.get_collaboration_cost()
 
-        rand = np.random.random()
+        # Drawn for every human at once by the model at the start of the step
+        rand = self.model.collaboration_rolls[self.idx]
         # Collaboration if rand is GREATER than our collaboration_cost (Higher collaboration_cost means less likely to collaborate)
         if rand > collaboration_cost:
             return True
@@ -638,21 +730,21 @@ class Human(Agent):
 
     def verbal_collaboration(self, target_agent: Self, target_location: Coordinate):
         success = False
-        for _, agents in self.visible_tiles:
+        for _, agents in self.visible_occupied_tiles:
             for agent in agents:
-                if isinstance(agent, Human) and agent.get_mobility() == Human.Mobility.NORMAL:
+                if agent.KIND == Kind.HUMAN and agent.get_mobility() == _NORMAL:
                     if not agent.believes_alarm:
                         agent.set_believes(True)
 
                     # Inform the agent of the target location
-                    if not target_location in agent.known_tiles:
-                        agent.known_tiles[target_location] = set()
-
-                    agent.known_tiles[target_location].add(target_agent)
+                    agent.known_tiles[target_location] = agent.known_tiles.get(
+                        target_location, frozenset()
+                    ) | {target_agent}
+                    agent.known_mask[target_location] = True
                     success = True
 
         if success:
-            print("Agent informed others of a fire exit!")
+            logger.debug("Agent informed others of a fire exit!")
             self.verbal_collaboration_count += 1
 
     def check_for_collaboration(self):
@@ -661,89 +753,68 @@ class Human(Agent):
             return
 
         if self.test_collaboration():
-            for location, visible_agents in self.visible_tiles:
+            # Only the tiles with something visible on them can hold anyone to collaborate with
+            for location, visible_agents in self.visible_occupied_tiles:
                 if self.planned_action:
                     break
 
                 for agent in visible_agents:
-                    if isinstance(agent, Human) and not self.planned_action:
-                        if agent.get_mobility() == Human.Mobility.INCAPACITATED:
+                    if agent.KIND == Kind.HUMAN and not self.planned_action:
+                        if agent.get_mobility() == _INCAPACITATED:
                             # If the agent is incapacitated, help them
                             # Physical collaboration
                             # Plan to move toward the target
-                            self.planned_target = (
-                                agent,
-                                location,
-                            )
+                            self.planned_target_agent = agent
+                            self.planned_target_pos = location
                             # Plan to carry the agent
-                            self.planned_action = Human.Action.PHYSICAL_SUPPORT
+                            self.planned_action = _PHYSICAL_SUPPORT
                             # print("Agent planned physical collaboration at", location)
                             break
-                        elif (
-                            agent.get_mobility() == Human.Mobility.PANIC
-                            and not self.planned_action
-                        ):
+                        elif agent.get_mobility() == _PANIC and not self.planned_action:
                             # Morale collaboration
                             # Plan to move toward the target
-                            self.planned_target = (
-                                agent,
-                                location,
-                            )
+                            self.planned_target_agent = agent
+                            self.planned_target_pos = location
                             # Plan to do morale collaboration with the agent
-                            self.planned_action = Human.Action.MORALE_SUPPORT
+                            self.planned_action = _MORALE_SUPPORT
                             # print("Agent planned morale collaboration at", location)
                             break
-                    elif isinstance(agent, FireExit):
+                    elif agent.KIND == Kind.EXIT:
                         # Verbal collaboration
                         self.verbal_collaboration(agent, location)
 
     def get_next_location(self, path):
-        path_length = len(path)
-        speed_int = int(np.round(self.speed))
-
+        # Every step along the path costs the same, so the furthest reachable location is simply
+        # indexed by the agent's speed (or the end of the path, if it is shorter than that)
+        next_index = min(int(round(self.speed)), len(path) - 1)
+        return (path[next_index], path[: next_index + 1])
+
+    def get_path(self, target, include_target=True, blocked=frozenset()) -> list[Coordinate]:
+        """
+        Returns a shortest path from our position to target, avoiding any locations in blocked
+        """
+        path = []
         try:
-            if path_length <= speed_int:
-                next_location = path[path_length - 1]
+            if blocked:
+                path = self.model.get_shortest_path(self.pos, target, blocked)
             else:
-                next_location = path[speed_int]
+                path = self.get_unblocked_path(target)
 
-            next_path = []
-            for location in path:
-                next_path.append(location)
-                if location == next_location:
-                    break
-
-            return (next_location, next_path)
-        except Exception as e:
-            raise Exception(
-                f"Failed to get next location: {e}\nPath: {path},\nlen: {length},\nSpeed: {self.speed}"
-            )
-
-    def get_path(self, graph, target, include_target=True) -> list[Coordinate]:
-        path = []
-        visible_tiles_pos = [pos for pos, _ in self.visible_tiles]
+            # TODO: A more naive path algorithm could be used when the target isn't visible
+            if not include_target and not self.visible_mask[target]:
+                # We don't want the target included in the path, so delete the last element
+                del path[-1]
 
-        try:
-            if target in visible_tiles_pos:  # Target is visible, so simply take the shortest path
-                path = nx.shortest_path(graph, self.pos, target)
-            else:  # Target is not visible, so do less efficient pathing
-                # TODO: In the future this could be replaced with a more naive path algorithm
-                path = nx.shortest_path(graph, self.pos, target)
-
-                if not include_target:
-                    del path[
-                        -1
-                    ]  # We don't want the target included in the path, so delete the last element
-
-            return list(path)
+            return path
         except nx.exception.NodeNotFound as e:
-            graph_nodes = graph.nodes()
-
-            if target not in graph_nodes:
-                contents = self.model.grid.get_cell_list_contents(target)
-                print(f"Target node not found! Expected {target}, with contents {contents}")
+            if target not in self.model.graph or target in blocked:
+                if logger.isEnabledFor(logging.DEBUG):
+                    contents = self.model.grid.get_cell_list_contents(target)
+                    logger.debug(
+                        "Target node not found! Expected %s, with contents %s", target, contents
+                    )
                 return path
-            elif self.pos not in graph_nodes:
+            elif self.pos not in self.model.graph:
                 contents = self.model.grid.get_cell_list_contents(self.pos)
                 raise Exception(
                     f"Current position not found!\nPosition: {self.pos},\nContents: {contents}"
@@ -752,117 +823,119 @@ class Human(Agent):
                 raise e
 
         except nx.exception.NetworkXNoPath as e:
-            print(f"No path between nodes! ({self.pos} -> {target})")
+            logger.debug("No path between nodes! (%s -> %s)", self.pos, target)
             return path
 
-    def location_is_traversable(self, pos) -> bool:
-        if not self.model.grid.is_cell_empty(pos):
-            contents = self.model.grid.get_cell_list_contents(pos)
-            for agent in contents:
-                if not agent.traversable:
-                    return False
+    def get_unblocked_path(self, target: Coordinate) -> list[Coordinate]:
+        """
+        Returns the model's shortest path from our position to target, reusing the rest of the last
+        one if we are still on it. The graph never changes and the model always walks the same way
+        from a given location, so the remainder is exactly what a new search would give
+        """
+        cached_path = self.cached_path
+        if cached_path and cached_path[-1] == target:
+            try:
+                return cached_path[cached_path.index(self.pos) :]
+            except ValueError:
+                pass
+
+        path = self.model.get_shortest_path(self.pos, target)
+        self.cached_path = path[:]
+        return path
 
-        return True
+    def location_is_traversable(self, pos) -> bool:
+        return self.model.grid.blocking_count[pos] == 0
 
     def get_retreat_location(self, next_location) -> Coordinate:
         x, y = self.pos
         next_x, next_y = next_location
-        diff_x = x - next_x
-        diff_y = y - next_y
 
-        retreat_location = (sum([x, diff_x]), sum([y, diff_y]))
-        return retreat_location
+        # Mirror next_location through our position
+        return (2 * x - next_x, 2 * y - next_y)
 
     def check_retreat(self, next_path, next_location) -> bool:
-        # Get the contents of any visible locations in the next path
-        visible_path = []
-        for visible_pos, _ in self.visible_tiles:
-            if visible_pos in next_path:
-                visible_path.append(visible_pos)
-
-        visible_contents = self.model.grid.get_cell_list_contents(visible_path)
-        for agent in visible_contents:
-            if (isinstance(agent, Smoke) and not self.planned_action) or isinstance(agent, Fire):
-                # There's a danger in the visible path, so try and retreat in the opposite direction
-                # Retreat if there's fire, or smoke (and no collaboration attempt)
-                retreat_location = self.get_retreat_location(next_location)
-
-                # Check if retreat location is out of bounds
-                if not self.model.grid.out_of_bounds(retreat_location):
-                    # Check if the retreat location is also smoke, if so, we are surrounded by smoke, so move randomly
-                    contents = self.model.grid.get_cell_list_contents(retreat_location)
-                    for agent in contents:
-                        if isinstance(agent, Smoke) or isinstance(agent, Fire):
-                            self.get_random_target()
-                            print("Agent surrounded by smoke and moving randomly")
-                            retreat_location = None
-                            break
-
-                    if retreat_location:
-                        print("Agent retreating opposite to fire/smoke")
-                        self.planned_target = (None, retreat_location)
+        grid = self.model.grid
+
+        # Check for any danger in visible locations in the next path
+        xs, ys = zip(*next_path)
+        visible = self.visible_mask[xs, ys]
+        fire_ahead = (grid.fire_mask[xs, ys] & visible).any()
+        smoke_ahead = (grid.smoke_mask[xs, ys] & visible).any()
+
+        if (smoke_ahead and not self.planned_action) or fire_ahead:
+            # There's a danger in the visible path, so try and retreat in the opposite direction
+            # Retreat if there's fire, or smoke (and no collaboration attempt)
+            retreat_location = self.get_retreat_location(next_location)
+
+            # Check if retreat location is out of bounds
+            if not grid.out_of_bounds(retreat_location):
+                # Check if the retreat location is also smoke, if so, we are surrounded by smoke, so move randomly
+                if grid.smoke_mask[retreat_location] or grid.fire_mask[retreat_location]:
+                    self.get_random_target()
+                    logger.debug("Agent surrounded by smoke and moving randomly")
                 else:
-                    self.get_random_target()  # Since our retreat is out of bounds, just go to a random location
+                    logger.debug("Agent retreating opposite to fire/smoke")
+                    self.planned_target_agent = None
+                    self.planned_target_pos = retreat_location
+            else:
+                self.get_random_target()  # Since our retreat is out of bounds, just go to a random location
 
-                self.planned_action = Human.Action.RETREAT
-                return True
+            self.planned_action = _RETREAT
+            return True
 
         return False
 
-    def update_target(self):
+    def _validate_plan(self):
+        """
+        Update the location of a planned target agent and drop the plan if it can no longer be performed
+        """
+        planned_agent = self.planned_target_agent
+        planned_pos = self.planned_target_pos
+
         # If there was a target agent, check if target has moved or still exists
-        planned_agent = self.planned_target[0]
         if planned_agent:
-            current_pos = planned_agent.get_position()
-            if current_pos and current_pos != self.planned_target[1]:  # Agent has moved
-                self.planned_target = (planned_agent, current_pos)
-                # print("Target agent moved. Updating current position:", self.planned_target)
-            elif not current_pos:  # Agent no longer exists
-                # print("Target agent no longer exists. Dropping.", self.planned_target, current_pos)
-                self.planned_target = (None, None)
+            current_pos = planned_agent.pos
+            if not current_pos:  # Agent no longer exists
+                self.planned_target_agent = None
+                self.planned_target_pos = None
                 self.planned_action = None
+                return
+            elif current_pos != planned_pos:  # Agent has moved
+                self.planned_target_pos = current_pos
 
-    def update_action(self):
-        planned_agent, _ = self.planned_target
+        if not self.planned_action:
+            return
 
-        if planned_agent:
+        if not planned_agent:
+            # Without a target agent, only a retreat can still be performed
+            if self.planned_action != _RETREAT:
+                self.planned_target_agent = None
+                self.planned_target_pos = None
+                self.planned_action = None
+        elif self.planned_action == _MORALE_SUPPORT:
+            # With a target agent only morale support is checked here. A physical support plan is
+            # kept while its target exists, and perform_action won't pick up a carried agent.
             # Agent had planned morale collaboration, but the agent is no longer panicking or no longer alive, so drop it.
-            if self.planned_action == Human.Action.MORALE_SUPPORT and (
-                planned_agent.get_mobility() != Human.Mobility.PANIC
-                or not planned_agent.get_status() == Human.Status.ALIVE
-            ):
-                # print("Target agent no longer panicking. Dropping action.")
-                self.planned_target = (None, None)
+            if planned_agent.mobility != _PANIC or planned_agent._status != _ALIVE:
+                self.planned_target_agent = None
+                self.planned_target_pos = None
                 self.planned_action = None
-            # Agent had planned physical collaboration, but the agent is no longer incapacitated or has already been carried or is not alive, so drop it.
-        elif self.planned_action == Human.Action.PHYSICAL_SUPPORT and (
-            (planned_agent.get_mobility() != Human.Mobility.INCAPACITATED)
-            or planned_agent.is_carried()
-            or planned_agent.get_status() != Human.Status.ALIVE
-        ):
-            self.planned_target = (None, None)
-            self.planned_action = None
-        elif self.planned_action == Human.Action.RETREAT:
-            return
-        else:  # Can no longer perform the action
-            self.planned_target = (None, None)
-            self.planned_action = None
 
     def perform_action(self):
-        agent, _ = self.planned_target
+        agent = self.planned_target_agent
 
-        if self.planned_action == Human.Action.PHYSICAL_SUPPORT:
+        if self.planned_action == _PHYSICAL_SUPPORT:
             if not agent.is_carried():
                 self.carrying = agent
                 agent.set_carried(True)
                 self.physical_collaboration_count += 1
-                print("Agent started carrying another agent")
-        elif self.planned_action == Human.Action.MORALE_SUPPORT:
+                logger.debug("Agent started carrying another agent")
+        elif self.planned_action == _MORALE_SUPPORT:
             # Attempt to give the agent a permanent morale boost according to your experience score
             if agent.attempt_morale_boost(self.experience):
-                print("Morale boost succeeded")
+                logger.debug("Morale boost succeeded")
             else:
-                print("Morale boost failed")
+                logger.debug("Morale boost failed")
 
             self.morale_collaboration_count += 1
 
@@ -870,12 +943,12 @@ class Human(Agent):
 
     def push_human_agent(self, agent: Self):
         # push the agent to a random 1 square away traversable Coordinate
-        neighborhood = self.model.grid.get_neighborhood(
-            agent.get_position(),
-            moore=True,
-            include_center=False,
-            radius=1,
-        )
+        x, y = agent.get_position()
+        neighborhood = [
+            (x + dx, y + dy)
+            for dx, dy in MOORE_OFFSETS
+            if not self.model.grid.out_of_bounds((x + dx, y + dy))
+        ]
         traversable_neighborhood = [
             neighbor_pos
             for neighbor_pos in neighborhood
@@ -884,10 +957,14 @@ class Human(Agent):
 
         if len(traversable_neighborhood) > 0:
             # push the human agent to a random traversable position
-            i = np.random.choice(len(traversable_neighborhood))
+            i = np.random.randint(len(traversable_neighborhood))
             push_pos = traversable_neighborhood[i]
-            print(
-                f"Agent {self.unique_id} pushed agent {agent.unique_id} from {agent.pos} to {push_pos}"
+            logger.debug(
+                "Agent %s pushed agent %s from %s to %s",
+                self.unique_id,
+                agent.unique_id,
+                agent.pos,
+                push_pos,
             )
             self.model.grid.move_agent(agent, push_pos)
 
@@ -895,30 +972,32 @@ class Human(Agent):
             current_health = agent.get_health()
             damage = np.random.uniform(self.MIN_PUSH_DAMAGE, self.MAX_PUSH_DAMAGE)
             agent.set_health(current_health - damage)
-        else:
+        elif logger.isEnabledFor(logging.DEBUG):
             neighborhood_contents = {}
             for pos in neighborhood:
                 neighborhood_contents[pos] = self.model.grid.get_cell_list_contents(pos)
-            print(
-                f"Could not push agent due to no traversable locations.\nNeighborhood Contents: {neighborhood_contents}"
+            logger.debug(
+                "Could not push agent due to no traversable locations.\nNeighborhood Contents: %s",
+                neighborhood_contents,
             )
 
     def move_toward_target(self):
         next_location: Coordinate = None
-        pruned_edges = set()
-        graph = deepcopy(self.model.graph)
+        # Locations found to be blocked this step, which pathing should avoid
+        blocked = set()
 
-        self.update_target()  # Get the latest location of a target, if it still exists
-        if self.planned_action:  # And if there's an action, check if it's still possible
-            self.update_action()
+        # Get the latest location of a target, if it still exists, and check the action is still possible
+        self._validate_plan()
 
-        while self.planned_target[1] and not next_location:
-            if self.location_is_traversable(self.planned_target[1]):
+        while self.planned_target_pos and not next_location:
+            if self.location_is_traversable(self.planned_target_pos):
                 # Target is traversable
-                path = self.get_path(graph, self.planned_target[1])
+                path = self.get_path(self.planned_target_pos, blocked=blocked)
             else:
                 # Target is not traversable (e.g. we are going to another Human), so don't include target in the path
-                path = self.get_path(graph, self.planned_target[1], include_target=False)
+                path = self.get_path(
+                    self.planned_target_pos, include_target=False, blocked=blocked
+                )
 
             if len(path) > 0:
                 next_location, next_path = self.get_next_location(path)
@@ -938,22 +1017,17 @@ class Human(Agent):
                     # Move normally
                     self.previous_pos = self.pos
                     self.model.grid.move_agent(self, next_location)
-                    self.visited_tiles.add(next_location)
+                    self.visited_mask[next_location] = True
 
                     if self.carrying:
                         agent = self.carrying
-                        if agent.get_status() == Human.Status.DEAD:
+                        if agent.get_status() == _DEAD:
                             # Agent is dead, so we can't carry them any more
                             self.stop_carrying()
                         else:
-                            # Agent is alive, so try to move them
-                            try:
-                                self.model.grid.move_agent(self.carrying, self.pos)
-                            except Exception as e:
-                                agent = self.carrying
-                                raise Exception(
-                                    f"Failed to move carried agent:\nException:{e}\nAgent: {agent}\nAgent Position: {agent.get_position()}\nSelf Agent Positon: {self.pos}"
-                                )
+                            # Agent is alive, so move them along with us
+                            assert agent.pos is not None, "Carried agent is not on the grid"
+                            self.model.grid.move_agent(agent, self.pos)
 
                 elif self.pos == path[-1]:
                     # The human reached their target!
@@ -961,7 +1035,8 @@ class Human(Agent):
                     if self.planned_action:
                         self.perform_action()
 
-                    self.planned_target = (None, None)
+                    self.planned_target_agent = None
+                    self.planned_target_pos = None
                     self.planned_action = None
                     break
 
@@ -973,83 +1048,79 @@ class Human(Agent):
                     contents = self.model.grid.get_cell_list_contents(next_location)
                     for agent in contents:
                         # Test the panic value to see if this agent "pushes" the blocking agent aside
-                        if (
-                            isinstance(agent, Human)
-                            and agent.mobility != Human.Mobility.INCAPACITATED
-                        ) and (
+                        if (agent.KIND == Kind.HUMAN and agent.mobility != _INCAPACITATED) and (
                             (
                                 self.get_panic_score() >= self.PANIC_THRESHOLD
-                                and self.mobility == Human.Mobility.NORMAL
+                                and self.mobility == _NORMAL
                             )
-                            or self.mobility == Human.Mobility.PANIC
+                            or self.mobility == _PANIC
                         ):
                             # push the agent and then move to the next_location
                             self.push_human_agent(agent)
                             self.previous_pos = self.pos
                             self.model.grid.move_agent(self, next_location)
-                            self.visited_tiles.add(next_location)
+                            self.visited_mask[next_location] = True
                             pushed = True
                             break
                     if pushed:
                         continue
 
-                    # Remove the next location from the temporary graph so we can try pathing again without it
-                    edges = graph.edges(next_location)
-                    pruned_edges.update(edges)
-                    graph.remove_node(next_location)
+                    # Block the next location so we can try pathing again without it
+                    blocked.add(next_location)
 
                     # Reset planned_target if the next location was the end of the path
                     if next_location == path[-1]:
                         next_location = None
-                        self.planned_target = (None, None)
+                        self.planned_target_agent = None
+                        self.planned_target_pos = None
                         self.planned_action = None
                         break
                     else:
                         next_location = None
 
             else:  # No path is possible, so drop the target
-                self.planned_target = (None, None)
+                self.planned_target_agent = None
+                self.planned_target_pos = None
                 self.planned_action = None
                 break
 
-        if len(pruned_edges) > 0:
-            # Add back the edges we removed when removing any non-traversable nodes from the global graph, because they may be traversable again next step
-            graph.add_edges_from(list(pruned_edges))
-
     def step(self):
         if not self.escaped and self.pos:
             self.health_mobility_rules()
 
-            if self.mobility == Human.Mobility.INCAPACITATED or not self.pos:
+            if self.mobility == _INCAPACITATED or not self.pos:
                 # Incapacitated or died, so return already
                 return
 
-            self.visible_tiles = self.get_visible_tiles()
+            self.update_visible_tiles()
 
-            self.panic_rules()
+            # Panic is only caused by fire, smoke or the dead in sight, none of which exist before
+            # a fire has started
+            if self.model.fire_started:
+                self.panic_rules()
 
             self.learn_environment()
 
-            planned_target_agent = self.planned_target[0]
-
             # If a fire has started and the agent believes it, attempt to plan an exit location if we haven't already and we aren't performing an action
             if self.model.fire_started and self.believes_alarm:
-                if not isinstance(planned_target_agent, FireExit) and not self.planned_action:
+                planned_agent = self.planned_target_agent
+                planning_exit = planned_agent is not None and planned_agent.KIND == Kind.EXIT
+                if not planning_exit and not self.planned_action:
                     self.attempt_exit_plan()
 
                 # Check if anything in vision can be collaborated with, if the agent has normal mobility
-                if self.mobility == Human.Mobility.NORMAL and self.collaborates:
+                if self.mobility == _NORMAL and self.collaborates:
                     self.check_for_collaboration()
 
-            planned_pos = self.planned_target[1]
+            planned_pos = self.planned_target_pos
             if not planned_pos:
                 self.get_random_target()
-            elif self.mobility == Human.Mobility.PANIC:  # Panic
+            elif self.mobility == _PANIC:  # Panic
                 panic_score = self.get_panic_score()
 
                 if panic_score > 0.9 and np.random.random() < panic_score:
                     # If they have above 90% panic score, test the score to see if they faint
-                    print("Agent fainted!")
+                    logger.debug("Agent fainted!")
                     self.incapacitate()
                     return
                 # if (
@@ -1057,30 +1128,75 @@ class Human(Agent):
                 # ):  # Test their panic score to see if they will move randomly, or keep their original target
                 #     print("Agent moving randomly in panic!")
                 #     self.planned_action = None
-                #     self.planned_target = (None, None)
+                #     self.planned_target_agent = None
+                #     self.planned_target_pos = None
                 #     self.get_random_target()
 
             self.move_toward_target()
 
             # Agent reached a fire escape, proceed to exit
-            if self.model.fire_started and self.pos in self.model.fire_exits.keys():
+            if self.model.fire_started and self.pos in self.model.fire_exits:
                 if self.carrying:
                     carried_agent = self.carrying
                     carried_agent.escaped = True
+                    carried_agent.update_status()
                     self.model.grid.remove_agent(carried_agent)
 
                 self.escaped = True
+                self.update_status()
                 self.model.grid.remove_agent(self)
 
+    def update_status(self):
+        """
+        Recalculate the cached status, which only changes when health or escaped are modified
+        """
+        if self.escaped:
+            self._status = _ESCAPED
+        elif self.health > self.MIN_HEALTH:
+            self._status = _ALIVE
+        else:
+            self._status = _DEAD
+
     def get_status(self):
-        if self.health > self.MIN_HEALTH and not self.escaped:
-            return Human.Status.ALIVE
-        elif self.health <= self.MIN_HEALTH and not self.escaped:
-            return Human.Status.DEAD
-        elif self.escaped:
-            return Human.Status.ESCAPED
+        return self._status
+
+    @property
+    def pos(self) -> Union[Coordinate, None]:
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: Union[Coordinate, None]):
+        # The grid sets this as we are placed, moved and removed, so the model's copy follows along
+        self._pos = value
+        if value is None:
+            self.model.human_on_grid[self.idx] = False
+        else:
+            self.model.human_positions[self.idx] = value
+            self.model.human_on_grid[self.idx] = True
+
+    @property
+    def health(self) -> float:
+        return self.model.human_health[self.idx]
+
+    @health.setter
+    def health(self, value: float):
+        self.model.human_health[self.idx] = value
+
+    @property
+    def speed(self) -> float:
+        return self.model.human_speed[self.idx]
 
-        return None
+    @speed.setter
+    def speed(self, value: float):
+        self.model.human_speed[self.idx] = value
+
+    @property
+    def shock(self) -> float:
+        return self.model.human_shock[self.idx]
+
+    @shock.setter
+    def shock(self, value: float):
+        self.model.human_shock[self.idx] = value
 
     def get_speed(self):
         return self.speed
@@ -1095,18 +1211,20 @@ class Human(Agent):
         return self.pos
 
     def get_plan(self):
-        return (self.planned_target, self.planned_action)
+        return ((self.planned_target_agent, self.planned_target_pos), self.planned_action)
 
     def set_plan(self, agent, location):
         self.planned_action = None
-        self.planned_target = (agent, location)
+        self.planned_target_agent = agent
+        self.planned_target_pos = location
 
     def set_health(self, value: float):
         self.health = value
+        self.update_status()
 
     def set_believes(self, value: bool):
         if value and not self.believes_alarm:
-            print("Agent told to believe the alarm!")
+            logger.debug("Agent told to believe the alarm!")
 
         self.believes_alarm = value
 
@@ -1114,7 +1232,7 @@ class Human(Agent):
         rand = np.random.random()
         if rand < (experience / self.MAX_EXPERIENCE):
             self.morale_boost = True
-            self.mobility = Human.Mobility.NORMAL
+            self.mobility = _NORMAL
             return True
         else:
             return False
@@ -1125,7 +1243,7 @@ class Human(Agent):
             carried_agent.set_carried(False)
             self.carrying = None
             self.planned_action = None
-            print("Agent stopped carrying another agent")
+            logger.debug("Agent stopped carrying another agent")
 
     def set_carried(self, value: bool):
         self.carried = value
@@ -1147,3 +1265,16 @@ class Human(Agent):
 
     def get_physical_collaboration_count(self):
         return self.physical_collaboration_count
+
+
+# Module-level aliases of the enum members compared in the Human hot paths, which saves resolving
+# Human -> enum -> member on every comparison
+_INCAPACITATED = Human.Mobility.INCAPACITATED
+_NORMAL = Human.Mobility.NORMAL
+_PANIC = Human.Mobility.PANIC
+_DEAD = Human.Status.DEAD
+_ALIVE = Human.Status.ALIVE
+_ESCAPED = Human.Status.ESCAPED
+_RETREAT = Human.Action.RETREAT
+_MORALE_SUPPORT = Human.Action.MORALE_SUPPORT
+_PHYSICAL_SUPPORT = Human.Action.PHYSICAL_SUPPORT
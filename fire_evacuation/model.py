@@ -1,3 +1,4 @@
+import logging
 import os
 import numpy as np
 import networkx as nx
@@ -6,10 +7,20 @@ import time
 
 from mesa import Model
 from mesa.datacollection import DataCollector
-from mesa.space import Coordinate, MultiGrid
+from mesa.space import Coordinate
 from mesa.time import RandomActivation
 
-from .agent import Human, Wall, FireExit, Furniture, Fire, Door
+from .agent import Human, Kind, Wall, FireExit, Furniture, Fire, Smoke, Door
+from .space import (
+    FloorGrid,
+    astar_path,
+    grid_distances,
+    moore_neighbourhood_count,
+    von_neumann_neighbours,
+)
+from .utils import MOORE_OFFSETS
+
+logger = logging.getLogger(__name__)
 
 
 class FireEvacuation(Model):
@@ -28,6 +39,9 @@ class FireEvacuation(Model):
     MIN_VISION = 1
     # MAX_VISION is simply the size of the grid
 
+    # How many targets to keep shortest path searches for before the oldest are discarded
+    MAX_CACHED_PATH_TARGETS = 256
+
     def __init__(
         self,
         floor_plan_file: str,
@@ -62,7 +76,20 @@ class FireEvacuation(Model):
         # Set up model objects
         self.schedule = RandomActivation(self)
 
-        self.grid = MultiGrid(height, width, torus=False)
+        self.grid = FloorGrid(height, width, torus=False)
+
+        # The step from which the smoke on each cell starts spreading
+        self.smoke_spread_step = np.zeros(self.grid.smoke_mask.shape, dtype=np.int32)
+
+        # Per-human state, stored as arrays indexed by Human.idx so it can be updated all at once
+        self.humans: list[Human] = []
+        self.human_health = np.zeros(human_count)
+        self.human_speed = np.zeros(human_count)
+        self.human_shock = np.zeros(human_count)
+        self.human_positions = np.zeros((human_count, 2), dtype=np.int32)
+        self.human_on_grid = np.zeros(human_count, dtype=bool)
+        # Random rolls used by humans testing whether to collaborate, redrawn every step
+        self.collaboration_rolls = np.zeros(human_count)
 
         # Used to start a fire at a random furniture location
         self.furniture: dict[Coordinate, Furniture] = {}
@@ -97,28 +124,38 @@ class FireEvacuation(Model):
             elif value == "S":
                 self.spawn_pos_list.append(pos)
 
+            # Floor objects never act on their own (fire and smoke are spread by the model), so
+            # they only go on the grid and the schedule is left to the humans
             if floor_object:
                 self.grid.place_agent(floor_object, pos)
-                self.schedule.add(floor_object)
 
         # Create a graph of traversable routes, used by agents for pathing
         self.graph = nx.Graph()
-        for agents, x, y in self.grid.coord_iter():
+        traversable = self.grid.blocking_count == 0
+        for x, y in np.argwhere(traversable).tolist():
             pos = (x, y)
-
-            # If the location is empty, or there are no non-traversable agents
-            if len(agents) == 0 or not any(not agent.traversable for agent in agents):
-                neighbors_pos = self.grid.get_neighborhood(
-                    pos, moore=True, include_center=True, radius=1
-                )
-
-                for neighbor_pos in neighbors_pos:
-                    # If the neighbour position is empty, or no non-traversable contents, add an edge
-                    if self.grid.is_cell_empty(neighbor_pos) or not any(
-                        not agent.traversable
-                        for agent in self.grid.get_cell_list_contents(neighbor_pos)
-                    ):
-                        self.graph.add_edge(pos, neighbor_pos)
+            neighbors_pos = self.grid.get_neighborhood(
+                pos, moore=True, include_center=True, radius=1
+            )
+
+            for neighbor_pos in neighbors_pos:
+                # If the neighbour position has no non-traversable contents, add an edge
+                if traversable[neighbor_pos]:
+                    self.graph.add_edge(pos, neighbor_pos)
+
+        # The graph never changes, so one breadth-first search from a target gives the shortest
+        # path to it from everywhere. The search runs over a mask of the graph's nodes, and the
+        # resulting distances to each target are kept.
+        self.graph_mask = np.zeros((self.width, self.height), dtype=bool)
+        for pos in self.graph.nodes:
+            self.graph_mask[pos] = True
+
+        # Each node's neighbours as a plain tuple, for searches that can't use the cached distances
+        self.graph_adjacency: dict[Coordinate, tuple[Coordinate, ...]] = {
+            pos: tuple(neighbor for neighbor in self.graph.neighbors(pos) if neighbor != pos)
+            for pos in self.graph.nodes
+        }
+        self._path_distances: dict[Coordinate, list[list[int]]] = {}
 
         # Collects statistics from our model run
         self.datacollector = DataCollector(
@@ -216,10 +253,65 @@ class FireEvacuation(Model):
                 self.grid.place_agent(human, pos)
                 self.schedule.add(human)
             else:
-                print("No tile empty for human placement!")
+                logger.warning("No tile empty for human placement!")
 
         self.running = True
 
+    def get_shortest_path(
+        self, source: Coordinate, target: Coordinate, blocked: set[Coordinate] = frozenset()
+    ) -> list[Coordinate]:
+        """
+        Returns a shortest path from source to target through the model's graph, reusing one
+        breadth-first search from target for every query toward it. Locations in blocked are
+        treated as if they weren't in the graph, and searches avoiding them aren't kept. Raises the
+        same exceptions as nx.shortest_path.
+        """
+        if target not in self.graph or target in blocked:
+            raise nx.NodeNotFound(f"Target {target} is not in G")
+
+        if blocked:
+            # Searches avoiding blocked locations can't be reused, so search just toward the target
+            if source not in self.graph:
+                raise nx.NodeNotFound(f"Source {source} is not in G")
+
+            path = astar_path(self.graph_adjacency, source, target, blocked)
+            if path is None:
+                raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+            return path
+
+        distances = self._path_distances.get(target)
+        if distances is None:
+            if len(self._path_distances) >= self.MAX_CACHED_PATH_TARGETS:
+                del self._path_distances[next(iter(self._path_distances))]
+
+            # Kept as nested lists, since indexing them one cell at a time is faster than an array
+            distances = grid_distances(self.graph_mask, target).tolist()
+            self._path_distances[target] = distances
+
+        x, y = source
+        distance = distances[x][y]
+        if distance < 0:
+            if source not in self.graph:
+                raise nx.NodeNotFound(f"Source {source} is not in G")
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+        # Walk back down the distances, to any neighbour one step closer to the target each time
+        path = [source]
+        while distance > 0:
+            distance -= 1
+            for dx, dy in MOORE_OFFSETS:
+                next_x, next_y = x + dx, y + dy
+                if (
+                    0 <= next_x < self.width
+                    and 0 <= next_y < self.height
+                    and distances[next_x][next_y] == distance
+                ):
+                    x, y = next_x, next_y
+                    break
+            path.append((x, y))
+
+        return path
+
     # Plots line charts of various statistics from a run
     def save_figures(self):
         DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
@@ -271,18 +363,90 @@ class FireEvacuation(Model):
 
             fire = Fire(pos, self)
             self.grid.place_agent(fire, pos)
-            self.schedule.add(fire)
 
             self.fire_started = True
-            print(f"Fire started at position {pos}")
+            logger.info("Fire started at position %s", pos)
+
+    def spread_fire(self):
+        """
+        Spread every fire to the cells directly around it at once, using the grid's arrays
+        """
+        near_fire = von_neumann_neighbours(self.grid.fire_mask)
+
+        # Fire spreads to anything flammable which isn't already burning
+        new_fire = near_fire & ~self.grid.fire_mask & (self.grid.flammable_count > 0)
+        # Smoke is produced wherever there's something for it to spread through
+        new_smoke = near_fire & ~self.grid.smoke_mask & (self.grid.spreads_smoke_count > 0)
+
+        for pos in np.argwhere(new_fire).tolist():
+            pos = tuple(pos)
+            fire = Fire(pos, self)
+            self.grid.place_agent(fire, pos)
+
+        for pos in np.argwhere(new_smoke).tolist():
+            self.place_smoke(tuple(pos))
+
+    def spread_smoke(self):
+        """
+        Spread all smoke which has been around long enough to the cells directly around it at once,
+        using the grid's arrays
+        """
+        spreading = self.grid.smoke_mask & (self.smoke_spread_step <= self.schedule.steps)
+
+        # Smoke spreads anywhere nothing blocks it, including empty cells. Smoke blocks smoke, so a
+        # cell never gets more than one
+        new_smoke = von_neumann_neighbours(spreading) & (self.grid.blocks_smoke_count == 0)
+
+        for pos in np.argwhere(new_smoke).tolist():
+            self.place_smoke(tuple(pos))
+
+    def place_smoke(self, pos: Coordinate):
+        smoke = Smoke(pos, self)
+        self.grid.place_agent(smoke, pos)
+        self.smoke_spread_step[pos] = self.schedule.steps + Smoke.SPREAD_DELAY
+
+    def apply_hazard_damage(self):
+        """
+        Damage every human on the grid at once, according to the fire and smoke around them
+        """
+        idx = np.flatnonzero(self.human_on_grid)
+        if not idx.size:
+            return
+
+        xs, ys = self.human_positions[idx].T
+        fire_hits = moore_neighbourhood_count(self.grid.fire_mask)[xs, ys]
+        smoke_hits = moore_neighbourhood_count(self.grid.smoke_mask)[xs, ys]
+
+        health = self.human_health[idx]
+        health -= fire_hits * Human.HEALTH_MODIFIER_FIRE + smoke_hits * Human.HEALTH_MODIFIER_SMOKE
+
+        speed = self.human_speed[idx]
+        speed -= fire_hits * Human.SPEED_MODIFIER_FIRE
+        # Smoke starts to slow humans down once their health drops below the threshold
+        speed -= np.where(
+            health < Human.SLOWDOWN_THRESHOLD, smoke_hits * Human.SPEED_MODIFIER_SMOKE, 0
+        )
+
+        # Prevent health and speed from going below 0
+        self.human_health[idx] = np.maximum(health, Human.MIN_HEALTH)
+        self.human_speed[idx] = np.maximum(speed, Human.MIN_SPEED)
 
     def step(self):
         """
         Advance the model by one step.
         """
 
+        if self.fire_started:
+            self.apply_hazard_damage()
+
+        self.collaboration_rolls = np.random.random(self.human_count)
+
         self.schedule.step()
 
+        if self.fire_started:
+            self.spread_smoke()
+            self.spread_fire()
+
         # If there's no fire yet, attempt to start one
         if not self.fire_started:
             self.start_fire()
@@ -304,7 +468,7 @@ class FireEvacuation(Model):
 
         count = 0
         for agent in model.schedule.agents:
-            if isinstance(agent, Human):
+            if agent.KIND == Kind.HUMAN:
                 if collaboration_type == Human.Action.VERBAL_SUPPORT:
                     count += agent.get_verbal_collaboration_count()
                 elif collaboration_type == Human.Action.MORALE_SUPPORT:
@@ -321,7 +485,7 @@ class FireEvacuation(Model):
         """
         count = 0
         for agent in model.schedule.agents:
-            if isinstance(agent, Human) and agent.get_status() == status:
+            if agent.KIND == Kind.HUMAN and agent.get_status() == status:
                 count += 1
 
         return count
@@ -333,7 +497,7 @@ class FireEvacuation(Model):
         """
         count = 0
         for agent in model.schedule.agents:
-            if isinstance(agent, Human) and agent.get_mobility() == mobility:
+            if agent.KIND == Kind.HUMAN and agent.get_mobility() == mobility:
                 count += 1
 
         return count
@@ -0,0 +1,198 @@
+import heapq
+from typing import Union
+
+import numpy as np
+
+from mesa import Agent
+from mesa.space import Coordinate, MultiGrid
+
+from .agent import Kind
+
+
+def von_neumann_neighbours(mask: np.ndarray) -> np.ndarray:
+    """
+    Returns a mask of every cell which is directly above, below, left or right of a True cell in mask
+    """
+    neighbours = np.zeros_like(mask)
+    neighbours[1:, :] |= mask[:-1, :]
+    neighbours[:-1, :] |= mask[1:, :]
+    neighbours[:, 1:] |= mask[:, :-1]
+    neighbours[:, :-1] |= mask[:, 1:]
+
+    return neighbours
+
+
+def moore_neighbourhood_count(mask: np.ndarray) -> np.ndarray:
+    """
+    Returns the number of True cells in the 3x3 neighbourhood of each cell, including the cell itself
+    """
+    width, height = mask.shape
+    padded = np.pad(mask.astype(np.int32), 1)
+
+    counts = np.zeros((width, height), dtype=np.int32)
+    for dx in range(3):
+        for dy in range(3):
+            counts += padded[dx : dx + width, dy : dy + height]
+
+    return counts
+
+
+def grid_distances(passable: np.ndarray, target: Coordinate) -> np.ndarray:
+    """
+    Returns the number of steps from each cell to target, moving between passable cells in any of
+    the 8 directions, or -1 where target can't be reached. The search spreads out from target one
+    step at a time over the whole mask.
+    """
+    distances = np.full(passable.shape, -1, dtype=np.int32)
+    reached = np.zeros(passable.shape, dtype=bool)
+    reached[target] = True
+    frontier = reached.copy()
+
+    distance = 0
+    while frontier.any():
+        distances[frontier] = distance
+        distance += 1
+
+        # Grow the frontier by one cell in every direction, first along x and then along y
+        spread = frontier.copy()
+        spread[1:, :] |= frontier[:-1, :]
+        spread[:-1, :] |= frontier[1:, :]
+        grown = spread.copy()
+        grown[:, 1:] |= spread[:, :-1]
+        grown[:, :-1] |= spread[:, 1:]
+
+        frontier = grown & passable & ~reached
+        reached |= frontier
+
+    return distances
+
+
+def astar_path(
+    adjacency: dict[Coordinate, tuple[Coordinate, ...]],
+    start: Coordinate,
+    goal: Coordinate,
+    blocked: set[Coordinate],
+) -> Union[list[Coordinate], None]:
+    """
+    Returns a shortest path from start to goal through adjacency without passing through blocked,
+    or None if there isn't one. Every move costs 1, including diagonals, so the Chebyshev distance
+    to goal never overestimates and is used as the heuristic.
+    """
+    goal_x, goal_y = goal
+    came_from = {start: None}
+    costs = {start: 0}
+    frontier = [(max(abs(start[0] - goal_x), abs(start[1] - goal_y)), 0, start)]
+
+    while frontier:
+        _, cost, pos = heapq.heappop(frontier)
+
+        if pos == goal:
+            path = []
+            while pos is not None:
+                path.append(pos)
+                pos = came_from[pos]
+            path.reverse()
+            return path
+
+        # Skip entries for locations which have since been reached more cheaply
+        if cost > costs[pos]:
+            continue
+
+        cost += 1
+        for neighbour in adjacency[pos]:
+            if neighbour in blocked or cost >= costs.get(neighbour, cost + 1):
+                continue
+
+            costs[neighbour] = cost
+            came_from[neighbour] = pos
+            x, y = neighbour
+            estimate = cost + max(abs(x - goal_x), abs(y - goal_y))
+            heapq.heappush(frontier, (estimate, cost, neighbour))
+
+    return None
+
+
+class FloorGrid(MultiGrid):
+    """
+    A MultiGrid which also keeps NumPy arrays describing what is on each cell, updated as agents are
+    placed, moved and removed, so hot paths can index them instead of walking cell contents.
+
+    Attributes:
+        wall_mask: Whether each cell contains a Wall
+        fire_mask: Whether each cell contains a Fire
+        smoke_mask: Whether each cell contains Smoke
+        door_mask: Whether each cell contains a Door
+        human_count: The number of Humans on each cell
+        dead_count: The number of DeadHumans on each cell
+        flammable_count: The number of flammable agents on each cell
+        spreads_smoke_count: The number of agents on each cell that smoke can spread through
+        blocks_smoke_count: The number of agents on each cell that smoke can't spread through
+        blocking_count: The number of agents on each cell that can't be walked through
+        agent_count: The number of agents of any kind on each cell
+    """
+
+    def __init__(self, width: int, height: int, torus: bool):
+        super().__init__(width, height, torus)
+
+        shape = (width, height)
+        self.wall_mask = np.zeros(shape, dtype=bool)
+        self.fire_mask = np.zeros(shape, dtype=bool)
+        self.smoke_mask = np.zeros(shape, dtype=bool)
+        self.door_mask = np.zeros(shape, dtype=bool)
+
+        # Humans move around and several agents can share a cell, so these are counts rather than masks
+        self.flammable_count = np.zeros(shape, dtype=np.int32)
+        self.spreads_smoke_count = np.zeros(shape, dtype=np.int32)
+        self.blocks_smoke_count = np.zeros(shape, dtype=np.int32)
+        self.blocking_count = np.zeros(shape, dtype=np.int32)
+        self.agent_count = np.zeros(shape, dtype=np.int32)
+        self.human_count = np.zeros(shape, dtype=np.int32)
+        self.dead_count = np.zeros(shape, dtype=np.int32)
+
+    def place_agent(self, agent: Agent, pos: Coordinate):
+        super().place_agent(agent, pos)
+        self._update_layers(agent, pos, 1)
+
+    def move_agent(self, agent: Agent, pos: Coordinate):
+        self._update_layers(agent, agent.pos, -1)
+        super().move_agent(agent, pos)
+        self._update_layers(agent, agent.pos, 1)
+
+    def remove_agent(self, agent: Agent):
+        self._update_layers(agent, agent.pos, -1)
+        super().remove_agent(agent)
+
+    def set_traversable(self, agent: Agent, traversable: bool):
+        """
+        Change whether an agent can be walked through, keeping blocking_count in step
+        """
+        if agent.pos is not None and agent.traversable != traversable:
+            self.blocking_count[agent.pos] += -1 if traversable else 1
+        agent.traversable = traversable
+
+    def _update_layers(self, agent: Agent, pos: Coordinate, change: int):
+        present = change > 0
+        self.agent_count[pos] += change
+
+        kind = agent.KIND
+        if kind == Kind.WALL:
+            self.wall_mask[pos] = present
+        elif kind == Kind.FIRE:
+            self.fire_mask[pos] = present
+        elif kind == Kind.SMOKE:
+            self.smoke_mask[pos] = present
+        elif kind == Kind.DOOR:
+            self.door_mask[pos] = present
+        elif kind == Kind.HUMAN:
+            self.human_count[pos] += change
+        elif kind == Kind.DEAD:
+            self.dead_count[pos] += change
+
+        if agent.flammable:
+            self.flammable_count[pos] += change
+        if not agent.traversable:
+            self.blocking_count[pos] += change
+        if agent.spreads_smoke:
+            self.spreads_smoke_count[pos] += change
+        else:
+            self.blocks_smoke_count[pos] += change
@@ -1,5 +1,8 @@
 import uuid
 
+# Offsets to the 8 cells surrounding a cell
+MOORE_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
 
 def get_random_id() -> uuid.UUID:
     return uuid.uuid4()